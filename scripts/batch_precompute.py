@@ -0,0 +1,114 @@
+# batch_precompute.py
+#
+# Precomputes answers for a list of questions through the OpenAI Batch API
+# (about half the cost of synchronous calls) and stores them in the semantic
+# cache, so the same questions asked in the app are answered from cache.
+#
+# Usage: python scripts/batch_precompute.py questions.csv [--model MODEL]
+#
+# Without --model each question goes to the same tier the app would pick for it.
+#
+# questions.csv either has a "question" column or one question per row in
+# the first column. OPENAI_API_KEY must be set in the environment.
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from theology_prompts import MAX_TOKENS, build_messages, select_model
+from semantic_cache import EMBEDDING_MODEL, SemanticCache
+
+POLL_SECONDS = 60
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+
+def read_questions(path: str):
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = [row for row in csv.reader(f) if row]
+    header = [cell.strip().lower() for cell in rows[0]] if rows else []
+    if "question" in header:
+        column = header.index("question")
+        rows = rows[1:]
+    else:
+        column = 0
+    # Skip rows too short to have the question column, and blank questions
+    return [row[column].strip() for row in rows if len(row) > column and row[column].strip()]
+
+def write_batch_input(questions, model, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        for i, question in enumerate(questions):
+            question_model = model or select_model(question)
+            request = {
+                "custom_id": f"q-{i}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": question_model,
+                    "messages": build_messages(question, question_model),
+                    "temperature": 0.0,
+                    "max_tokens": MAX_TOKENS,
+                },
+            }
+            f.write(json.dumps(request) + "\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute answers via the OpenAI Batch API.")
+    parser.add_argument("questions", help="CSV file of questions")
+    parser.add_argument("--model", default=None, help="override the per-question model choice")
+    parser.add_argument("--batch-file", default="batch_input.jsonl")
+    args = parser.parse_args()
+
+    # Imported here so read_questions and write_batch_input can be used without them
+    from openai import OpenAI
+    from sentence_transformers import SentenceTransformer
+
+    questions = read_questions(args.questions)
+    if not questions:
+        sys.exit(f"No questions found in {args.questions}")
+    write_batch_input(questions, args.model, args.batch_file)
+
+    client = OpenAI()
+    with open(args.batch_file, "rb") as f:
+        input_file = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    logging.info(f"Submitted batch {batch.id} with {len(questions)} questions")
+
+    while batch.status not in TERMINAL_STATUSES:
+        time.sleep(POLL_SECONDS)
+        batch = client.batches.retrieve(batch.id)
+        logging.info(f"Batch {batch.id}: {batch.status} ({batch.request_counts.completed}/{batch.request_counts.total})")
+
+    if batch.status != "completed" or not batch.output_file_id:
+        sys.exit(f"Batch {batch.id} ended with status {batch.status}")
+
+    embedder = SentenceTransformer(EMBEDDING_MODEL)
+    cache = SemanticCache(lambda: embedder)
+    stored = 0
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        result = json.loads(line)
+        question = questions[int(result["custom_id"].split("-", 1)[1])]
+        response = result.get("response") or {}
+        if response.get("status_code") != 200:
+            logging.warning(f"No answer for '{question}': {result.get('error')}")
+            continue
+        answer = response["body"]["choices"][0]["message"]["content"]
+        if not answer:
+            continue
+        qvec = cache.embed(question)
+        if cache.get(question, vector=qvec) is None:
+            cache.put(question, answer, vector=qvec)
+            stored += 1
+    logging.info(f"Stored {stored} answers in {cache.path}")
+
+if __name__ == "__main__":
+    main()
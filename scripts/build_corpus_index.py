@@ -0,0 +1,129 @@
+# build_corpus_index.py
+#
+# Offline ingestion for the local corpus search tool in theology_core.py.
+#
+# Usage: python scripts/build_corpus_index.py [corpus_dir]
+#
+# corpus_dir (default: corpus/) holds one plain-text (.txt or .md) file per
+# work, e.g. "Calvin - Institutes of the Christian Religion.txt". If the
+# first line of a file starts with "Source:", that line is used as the
+# citation instead of the file name.
+#
+# Mark the work's divisions with markdown headings, written the way the
+# SOURCE_REFERENCE in theology_prompts.py cites them, e.g. "# 1.3.1" for
+# Institutes book 1, chapter 3, section 1, or "# Topic 4" / "## 4.2.5" for
+# nested Turretin divisions. Each chunk is cited as the source followed by
+# its heading path ("Calvin, Institutes, 1.3.1"); text is never chunked
+# across a heading, so every citation points at one section.
+
+import os
+import re
+import sys
+import glob
+import pickle
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from semantic_cache import EMBEDDING_MODEL, CORPUS_INDEX_FILE, CORPUS_CHUNKS_FILE
+
+# ~512 tokens of English prose
+CHUNK_WORDS = 380
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s: %(message)s')
+
+def read_source(path: str):
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    first_line, _, rest = text.partition("\n")
+    if first_line.startswith("Source:"):
+        return first_line[len("Source:"):].strip(), rest
+    return os.path.splitext(os.path.basename(path))[0], text
+
+HEADING_RE = re.compile(r"^(#+)\s+(.*\S)\s*$")
+
+def split_sections(text: str):
+    """Split text on markdown headings into (heading path, section text) pairs.
+
+    The heading path joins the enclosing headings with ", ". Text before the
+    first heading gets an empty path.
+    """
+    sections, path, lines = [], [], []
+
+    def flush():
+        if "".join(lines).strip():
+            sections.append((", ".join(heading for _, heading in path), "\n".join(lines)))
+        lines.clear()
+
+    for line in text.splitlines():
+        match = HEADING_RE.match(line)
+        if match is None:
+            lines.append(line)
+            continue
+        flush()
+        level = len(match.group(1))
+        path = [(lvl, heading) for lvl, heading in path if lvl < level] + [(level, match.group(2))]
+    flush()
+    return sections
+
+def chunk_text(text: str):
+    # Pack whole paragraphs into chunks of roughly CHUNK_WORDS words
+    chunks, current = [], []
+    for paragraph in text.split("\n\n"):
+        words = paragraph.split()
+        if not words:
+            continue
+        if current and len(current) + len(words) > CHUNK_WORDS:
+            chunks.append(" ".join(current))
+            current = []
+        current.extend(words)
+        while len(current) > CHUNK_WORDS:
+            chunks.append(" ".join(current[:CHUNK_WORDS]))
+            current = current[CHUNK_WORDS:]
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+def main():
+    corpus_dir = sys.argv[1] if len(sys.argv) > 1 else "corpus"
+    paths = sorted(glob.glob(os.path.join(corpus_dir, "*.txt")) + glob.glob(os.path.join(corpus_dir, "*.md")))
+    if not paths:
+        sys.exit(f"No .txt or .md files found in {corpus_dir}/")
+
+    # Imported here so the chunking helpers above can be used without the ML stack
+    import faiss
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+
+    chunks = []
+    for path in paths:
+        source, text = read_source(path)
+        count = 0
+        for heading, section in split_sections(text):
+            citation = f"{source}, {heading}" if heading else source
+            pieces = chunk_text(section)
+            for i, piece in enumerate(pieces, start=1):
+                # Number the parts only when a section is too long for one chunk
+                label = f"{citation} (part {i})" if len(pieces) > 1 else citation
+                chunks.append({"source": label, "text": piece})
+            count += len(pieces)
+        logging.info(f"{source}: {count} chunks")
+
+    embedder = SentenceTransformer(EMBEDDING_MODEL)
+    vectors = embedder.encode(
+        [chunk["text"] for chunk in chunks],
+        normalize_embeddings=True,
+        batch_size=64,
+        show_progress_bar=True,
+    ).astype(np.float32)
+
+    # Inner product over normalized vectors is cosine similarity
+    index = faiss.IndexFlatIP(vectors.shape[1])
+    index.add(vectors)
+
+    faiss.write_index(index, CORPUS_INDEX_FILE)
+    with open(CORPUS_CHUNKS_FILE, "wb") as f:
+        pickle.dump(chunks, f)
+    logging.info(f"Wrote {len(chunks)} chunks to {CORPUS_INDEX_FILE} and {CORPUS_CHUNKS_FILE}")
+
+if __name__ == "__main__":
+    main()
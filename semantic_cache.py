@@ -0,0 +1,143 @@
+# semantic_cache.py
+#
+# Local-embedding settings and the semantic cache, shared by the Streamlit app
+# and the offline scripts.
+
+import os
+import pickle
+import logging
+import threading
+import numpy as np
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+# Built offline by scripts/build_corpus_index.py
+CORPUS_INDEX_FILE = "corpus_index.faiss"
+CORPUS_CHUNKS_FILE = "corpus_chunks.pkl"
+
+SEMANTIC_CACHE_FILE = "semantic_cache.pkl"
+SEMANTIC_CACHE_THRESHOLD = 0.92
+# Oldest entries are dropped past this, which also bounds the pickle rewritten on every put
+SEMANTIC_CACHE_MAX_ENTRIES = 2048
+
+class SemanticCache:
+    """Nearest-neighbour cache of previously answered questions, keyed by local embeddings.
+
+    One instance is shared by every session in a process. Other processes (e.g.
+    scripts/batch_precompute.py) may write the same file, so entries on disk are
+    merged in before every lookup and write rather than overwritten, and removing
+    the file (clear()) empties every instance that had loaded it.
+    """
+
+    def __init__(
+        self,
+        get_embedder,
+        path: str = SEMANTIC_CACHE_FILE,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+    ):
+        # get_embedder returns a SentenceTransformer; called lazily so loading the cache stays cheap
+        self.get_embedder = get_embedder
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        with self._lock:
+            self._reset()
+            self._merge_from_disk()
+
+    def embed(self, question: str):
+        # Callers doing a get() then put() for the same question embed once and pass the vector to both
+        return self.get_embedder().encode([question], normalize_embeddings=True).astype(np.float32)
+
+    def _reset(self):
+        # Caller holds self._lock. Vectors are created on the first entry, so their
+        # width follows the embedding model
+        self.vectors = None
+        self.questions = []
+        self.answers = []
+        self._stamp = None
+
+    @staticmethod
+    def _file_stamp(stat):
+        # Every save is a fresh file renamed into place, so the inode changes even
+        # when two saves land within the filesystem's mtime resolution
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _merge_from_disk(self):
+        # Caller holds self._lock
+        try:
+            stamp = self._file_stamp(os.stat(self.path))
+        except OSError:
+            if self._stamp is not None:
+                # The file this instance last saw is gone: another process cleared the cache
+                self._reset()
+            return
+        if stamp == self._stamp:
+            return
+        try:
+            with open(self.path, "rb") as f:
+                vectors, questions, answers = pickle.load(f)
+        except Exception as e:
+            logging.warning(f"Could not load semantic cache from {self.path}: {e}")
+            return
+        known = set(self.questions)
+        new = [i for i, question in enumerate(questions) if question not in known]
+        if new:
+            self.vectors = vectors[new] if self.vectors is None else np.vstack([self.vectors, vectors[new]])
+            self.questions.extend(questions[i] for i in new)
+            self.answers.extend(answers[i] for i in new)
+            self._evict()
+        self._stamp = stamp
+
+    def _evict(self):
+        # Caller holds self._lock; entries are kept in insertion order, so the oldest go first
+        excess = len(self.questions) - self.max_entries
+        if excess > 0:
+            self.vectors = self.vectors[excess:]
+            del self.questions[:excess]
+            del self.answers[:excess]
+
+    def _save(self):
+        # Caller holds self._lock; write-then-rename so readers never see a partial file
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump((self.vectors, self.questions, self.answers), f)
+            os.replace(tmp_path, self.path)
+            self._stamp = self._file_stamp(os.stat(self.path))
+        except Exception as e:
+            logging.warning(f"Could not persist semantic cache to {self.path}: {e}")
+
+    def get(self, question: str, vector=None):
+        qvec = self.embed(question) if vector is None else vector
+        with self._lock:
+            self._merge_from_disk()
+            if not self.answers:
+                return None
+            sims = self.vectors @ qvec.T
+            best = int(sims.argmax())
+            if sims[best, 0] >= self.threshold:
+                logging.info(f"Semantic cache hit ({sims[best, 0]:.3f}): '{self.questions[best]}'")
+                return self.answers[best]
+        return None
+
+    def put(self, question: str, answer: str, vector=None):
+        qvec = self.embed(question) if vector is None else vector
+        with self._lock:
+            self._merge_from_disk()
+            if question in self.questions:
+                # Already stored, e.g. by another process since our last lookup
+                self.answers[self.questions.index(question)] = answer
+            else:
+                self.vectors = qvec if self.vectors is None else np.vstack([self.vectors, qvec])
+                self.questions.append(question)
+                self.answers.append(answer)
+                self._evict()
+            self._save()
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+            if os.path.exists(self.path):
+                os.remove(self.path)
@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+pytest.importorskip("streamlit")
+pytest.importorskip("crewai")
+
+from crewai.crews.crew_output import CrewOutput
+from crewai.tasks.task_output import TaskOutput
+
+@pytest.fixture(scope="module")
+def core(tmp_path_factory):
+    # theology_core reads its API keys from st.secrets and opens its log file at
+    # import, both relative to the working directory
+    workdir = tmp_path_factory.mktemp("core")
+    (workdir / ".streamlit").mkdir()
+    (workdir / ".streamlit" / "secrets.toml").write_text('OPENAI_API_KEY = "test"\nSERPER_API_KEY = "test"\n')
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        import theology_core
+    finally:
+        os.chdir(cwd)
+    return theology_core
+
+def task_output(raw):
+    return TaskOutput(description="task", raw=raw, agent="agent")
+
+def test_extract_answer_prefers_crew_raw(core):
+    results = CrewOutput(raw="Answer.", tasks_output=[task_output("Task answer.")])
+    assert core.extract_answer(results) == "Answer."
+
+def test_extract_answer_falls_back_to_last_task(core):
+    results = CrewOutput(raw="", tasks_output=[task_output("First."), task_output("Last.")])
+    assert core.extract_answer(results) == "Last."
+
+def test_extract_answer_empty_crew_output(core):
+    assert core.extract_answer(CrewOutput(raw="", tasks_output=[])) == ""
+
+def test_extract_answer_other_results(core):
+    assert core.extract_answer("Plain answer.") == "Plain answer."
+    assert core.extract_answer(None) == ""
+
+def test_normalize_question(core):
+    assert core.normalize_question("  What IS\tgrace? ") == "what is grace?"
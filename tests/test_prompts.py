@@ -0,0 +1,24 @@
+from theology_prompts import (
+    AGENT_BACKSTORY, FAST_MODEL, FULL_MODEL, SOURCE_REFERENCE, agent_backstory, build_messages, select_model,
+)
+
+def test_short_questions_use_fast_model():
+    assert select_model("What is grace?") == FAST_MODEL
+
+def test_long_questions_use_full_model():
+    question = "How does Turretin distinguish the covenant of works from the covenant of grace in his Institutes?"
+    assert select_model(question) == FULL_MODEL
+
+def test_select_model_threshold_is_twelve_words():
+    assert select_model(" ".join(["word"] * 11)) == FAST_MODEL
+    assert select_model(" ".join(["word"] * 12)) == FULL_MODEL
+
+def test_source_reference_only_on_prompt_cache_models():
+    assert agent_backstory(FAST_MODEL).endswith(SOURCE_REFERENCE)
+    assert agent_backstory(FULL_MODEL) == AGENT_BACKSTORY
+
+def test_build_messages_follows_model():
+    system = build_messages("What is grace?", FAST_MODEL)[0]["content"]
+    assert SOURCE_REFERENCE in system
+    system = build_messages("What is grace?", FULL_MODEL)[0]["content"]
+    assert SOURCE_REFERENCE not in system
@@ -0,0 +1,61 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+import build_corpus_index
+from batch_precompute import read_questions
+from build_corpus_index import chunk_text, split_sections
+
+def write_csv(tmp_path, text):
+    path = tmp_path / "questions.csv"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+def test_read_questions_uses_question_column(tmp_path):
+    path = write_csv(tmp_path, "id,Question\n1,What is faith?\n2, What is hope? \n")
+    assert read_questions(path) == ["What is faith?", "What is hope?"]
+
+def test_read_questions_skips_short_and_blank_rows(tmp_path):
+    path = write_csv(tmp_path, "id,question\n1,What is faith?\n2\n\n3,  \n4,What is love?\n")
+    assert read_questions(path) == ["What is faith?", "What is love?"]
+
+def test_read_questions_without_header_uses_first_column(tmp_path):
+    path = write_csv(tmp_path, "What is faith?,extra\nWhat is hope?\n")
+    assert read_questions(path) == ["What is faith?", "What is hope?"]
+
+def test_read_questions_empty_file(tmp_path):
+    assert read_questions(write_csv(tmp_path, "")) == []
+
+def test_chunk_text_packs_whole_paragraphs(monkeypatch):
+    monkeypatch.setattr(build_corpus_index, "CHUNK_WORDS", 5)
+    assert chunk_text("a b c\n\nd e f g h\n\ni j k l m") == ["a b c", "d e f g h", "i j k l m"]
+    assert chunk_text("a b\n\nc d e") == ["a b c d e"]
+
+def test_chunk_text_splits_long_paragraphs(monkeypatch):
+    monkeypatch.setattr(build_corpus_index, "CHUNK_WORDS", 3)
+    assert chunk_text("a b c d e f g") == ["a b c", "d e f", "g"]
+
+def test_chunk_text_ignores_blank_paragraphs():
+    assert chunk_text("\n\n  \n\n") == []
+
+def test_split_sections_tracks_heading_path():
+    text = (
+        "Preface.\n\n"
+        "# Book 1\n"
+        "## 1.3.1\nFirst.\n\nSecond.\n"
+        "## 1.3.2\nThird.\n"
+        "# Book 2\n"
+        "## 2.1.1\nFourth.\n"
+    )
+    assert split_sections(text) == [
+        ("", "Preface.\n"),
+        ("Book 1, 1.3.1", "First.\n\nSecond."),
+        ("Book 1, 1.3.2", "Third."),
+        ("Book 2, 2.1.1", "Fourth."),
+    ]
+
+def test_split_sections_skips_empty_sections():
+    assert split_sections("# Topic 4\n\n## 4.2.5\nText.") == [("Topic 4, 4.2.5", "Text.")]
+
+def test_split_sections_without_headings():
+    assert split_sections("Just text.") == [("", "Just text.")]
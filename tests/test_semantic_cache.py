@@ -0,0 +1,98 @@
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from semantic_cache import SemanticCache
+
+# Questions that should match each other share a vector; everything else is orthogonal
+VECTORS = {
+    "what is justification?": [1, 0, 0, 0],
+    "what is justification": [1, 0, 0, 0],
+    "what is sanctification?": [0, 1, 0, 0],
+    "what is adoption?": [0, 0, 1, 0],
+    "what is glorification?": [0, 0, 0, 1],
+}
+
+class FakeEmbedder:
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, questions, normalize_embeddings=True):
+        self.calls += 1
+        return np.array([VECTORS[q] for q in questions], dtype=np.float32)
+
+@pytest.fixture
+def embedder():
+    return FakeEmbedder()
+
+@pytest.fixture
+def make_cache(tmp_path, embedder):
+    # Each instance stands in for a separate process sharing one cache file
+    path = str(tmp_path / "semantic_cache.pkl")
+    return lambda **kwargs: SemanticCache(lambda: embedder, path=path, **kwargs)
+
+def test_get_returns_similar_answer(make_cache):
+    cache = make_cache()
+    cache.put("what is justification?", "By faith alone.")
+    assert cache.get("what is justification") == "By faith alone."
+    assert cache.get("what is sanctification?") is None
+
+def test_empty_cache_misses(make_cache):
+    assert make_cache().get("what is justification?") is None
+
+def test_entries_written_by_another_instance_are_merged(make_cache):
+    first, second = make_cache(), make_cache()
+    first.put("what is justification?", "By faith alone.")
+    assert second.get("what is justification?") == "By faith alone."
+
+    second.put("what is sanctification?", "A work of free grace.")
+    assert first.get("what is sanctification?") == "A work of free grace."
+    assert first.questions == second.questions
+
+def test_merge_keeps_one_entry_per_question(make_cache):
+    first, second = make_cache(), make_cache()
+    first.put("what is justification?", "By faith alone.")
+    second.put("what is justification?", "By grace through faith.")
+    first.get("what is adoption?")
+    assert first.questions == ["what is justification?"]
+    assert len(first.answers) == len(first.vectors) == 1
+    assert second.answers == ["By grace through faith."]
+
+def test_new_instance_loads_existing_file(make_cache):
+    make_cache().put("what is adoption?", "An act of free grace.")
+    assert make_cache().get("what is adoption?") == "An act of free grace."
+
+def test_clear_empties_every_instance(make_cache, tmp_path):
+    first, second = make_cache(), make_cache()
+    first.put("what is justification?", "By faith alone.")
+    assert second.get("what is justification?") == "By faith alone."
+
+    first.clear()
+    assert not os.path.exists(tmp_path / "semantic_cache.pkl")
+    assert second.get("what is justification?") is None
+    assert second.questions == []
+
+def test_oldest_entries_are_evicted(make_cache):
+    cache = make_cache(max_entries=2)
+    cache.put("what is justification?", "1")
+    cache.put("what is sanctification?", "2")
+    cache.put("what is adoption?", "3")
+    assert cache.questions == ["what is sanctification?", "what is adoption?"]
+    assert len(cache.vectors) == 2
+    assert cache.get("what is justification?") is None
+
+def test_eviction_applies_to_merged_entries(make_cache):
+    writer, reader = make_cache(), make_cache(max_entries=2)
+    for question in ["what is justification?", "what is sanctification?", "what is adoption?"]:
+        writer.put(question, question)
+    reader.get("what is glorification?")
+    assert reader.questions == ["what is sanctification?", "what is adoption?"]
+
+def test_passed_vector_is_not_re_embedded(make_cache, embedder):
+    cache = make_cache()
+    qvec = cache.embed("what is justification?")
+    assert cache.get("what is justification?", vector=qvec) is None
+    cache.put("what is justification?", "By faith alone.", vector=qvec)
+    assert embedder.calls == 1
@@ -0,0 +1,415 @@
+# theology_core.py
+#
+# Crew construction, caching and search logic behind app.py. Imported once per
+# Streamlit worker so the CrewAI import cost is not paid on every rerun.
+
+import os
+import sys
+import streamlit as st
+import warnings
+warnings.filterwarnings("ignore", category=SyntaxWarning)
+
+# 2. Set environment variables from Streamlit secrets
+if "OPENAI_API_KEY" in st.secrets:
+    os.environ["OPENAI_API_KEY"] = st.secrets["OPENAI_API_KEY"]
+else:
+    st.error("OpenAI API key not found in secrets.")
+
+if "SERPER_API_KEY" in st.secrets:
+    os.environ["SERPER_API_KEY"] = st.secrets["SERPER_API_KEY"]
+else:
+    st.error("Serper Dev API key not found in secrets.")
+
+# 3. Set Chroma to use DuckDB to avoid sqlite3 dependency
+os.environ["CHROMA_DB_IMPL"] = "duckdb+parquet"
+
+# 4. Import pysqlite3 and override the default sqlite3 if available
+try:
+    import pysqlite3
+    sys.modules["sqlite3"] = pysqlite3
+except ImportError:
+    st.warning("pysqlite3 is not installed. Proceeding without overriding sqlite3.")
+
+# 5. Import other libraries
+import asyncio
+import atexit
+import json
+import logging
+import pickle
+import queue
+import threading
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+import httpx
+import numpy as np
+import openai
+from crewai import Crew, Task, Agent
+from crewai.crews.crew_output import CrewOutput
+from crewai.events import crewai_event_bus, LLMStreamChunkEvent
+from crewai.llms.providers.openai.completion import OpenAICompletion
+from crewai.tools import BaseTool
+from crewai_tools import SerperDevTool
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from theology_prompts import (
+    AGENT_ROLE, AGENT_GOAL, EXPECTED_OUTPUT, MAX_TOKENS,
+    agent_backstory, build_task_description, select_model,
+)
+from semantic_cache import EMBEDDING_MODEL, CORPUS_INDEX_FILE, CORPUS_CHUNKS_FILE, SemanticCache
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+    st.warning("sentence-transformers is not installed. Proceeding without the semantic cache.")
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+# 6. Configure logging
+# Records go through a QueueHandler; a background QueueListener does the file and
+# stdout writes so disk I/O stays off the request path. The guard keeps a second
+# import from starting another listener.
+if not logging.getLogger().handlers:
+    log_queue = queue.Queue(-1)
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s: %(message)s')
+    file_handler = logging.FileHandler("theology_output.log")
+    file_handler.setFormatter(formatter)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+    log_listener = QueueListener(log_queue, file_handler, stream_handler)
+    log_listener.start()
+    atexit.register(log_listener.stop)
+    logging.basicConfig(level=logging.INFO, handlers=[QueueHandler(log_queue)])
+
+# Token queues drained by the Streamlit main thread, keyed by id() of the streaming LLM
+_token_queues = {}
+_token_queues_lock = threading.Lock()
+
+@crewai_event_bus.on(LLMStreamChunkEvent)
+def _forward_stream_chunk(source, event):
+    # Chunk events fire for every LLM in the process; only forward those from
+    # an LLM a request is currently streaming through stream_tokens()
+    with _token_queues_lock:
+        token_queue = _token_queues.get(id(source))
+    if token_queue is not None and event.tool_call is None:
+        token_queue.put(event.chunk)
+
+@contextmanager
+def stream_tokens(llm, token_queue: queue.Queue):
+    with _token_queues_lock:
+        _token_queues[id(llm)] = token_queue
+    try:
+        yield
+    finally:
+        with _token_queues_lock:
+            _token_queues.pop(id(llm), None)
+
+# Per-service timeouts in seconds, passed on each call so neither inherits the shared
+# client's default. A full answer of MAX_TOKENS can take well over a minute to generate.
+OPENAI_TIMEOUT = 120.0
+SERPER_TIMEOUT = 10.0
+
+@st.cache_resource
+def get_http_client():
+    # One pooled HTTP/2 client for OpenAI and Serper, so repeat calls reuse TLS connections.
+    # Sync rather than httpx.AsyncClient: each request gets its own asyncio.run loop and
+    # kickoff_async runs crews on worker threads, so an async client couldn't be shared.
+    return httpx.Client(http2=True, timeout=30, limits=httpx.Limits(max_keepalive_connections=20))
+
+class PooledOpenAICompletion(OpenAICompletion):
+    """crewai's native OpenAI provider with its sync client on the shared HTTP client."""
+
+    def _build_sync_client(self):
+        # kickoff_async runs each crew's sync kickoff on a worker thread, so every
+        # OpenAI call goes through this client
+        return openai.OpenAI(**self._get_client_params(), http_client=get_http_client())
+
+def build_llm(model: str, stream: bool = False):
+    return PooledOpenAICompletion(
+        model=model,
+        provider="openai",
+        temperature=0.0,
+        max_tokens=MAX_TOKENS,
+        stream=stream,
+        # Forwarded to openai.OpenAI(), which applies it per request over the shared client's timeout
+        timeout=OPENAI_TIMEOUT,
+    )
+
+@st.cache_resource
+def get_embedder():
+    return SentenceTransformer(EMBEDDING_MODEL)
+
+def corpus_available() -> bool:
+    return (
+        faiss is not None
+        and SentenceTransformer is not None
+        and os.path.exists(CORPUS_INDEX_FILE)
+        and os.path.exists(CORPUS_CHUNKS_FILE)
+    )
+
+@st.cache_resource
+def get_corpus_index():
+    index = faiss.read_index(CORPUS_INDEX_FILE)
+    with open(CORPUS_CHUNKS_FILE, "rb") as f:
+        chunks = pickle.load(f)
+    return index, chunks
+
+class CorpusSearchTool(BaseTool):
+    name: str = "Classical Reformed corpus search"
+    description: str = (
+        "Searches a local corpus of classical Reformed sources (Calvin, Turretin, Bavinck, Hodge, Warfield, "
+        "the Westminster Standards, the Three Forms of Unity) and returns the most relevant passages with citations. "
+        "Input should be a search query."
+    )
+    k: int = 8
+
+    def _run(self, search_query: str) -> str:
+        index, chunks = get_corpus_index()
+        qvec = get_embedder().encode([search_query], normalize_embeddings=True).astype(np.float32)
+        _, ids = index.search(qvec, self.k)
+        passages = [chunks[i] for i in ids[0] if i != -1]
+        return "\n\n".join(f"[{chunk['source']}]\n{chunk['text']}" for chunk in passages)
+
+class PooledSerperDevTool(SerperDevTool):
+    """SerperDevTool that sends its API request through the shared HTTP client.
+
+    Only the transport changes; search types, country/location/locale and the
+    result formatting are all SerperDevTool's own.
+    """
+
+    def _make_api_request(self, search_query: str, search_type: str) -> dict:
+        payload = {"q": search_query, "num": self.n_results}
+        if self.country != "":
+            payload["gl"] = self.country
+        if self.location != "":
+            payload["location"] = self.location
+        if self.locale != "":
+            payload["hl"] = self.locale
+
+        response = get_http_client().post(
+            self._get_search_url(search_type),
+            headers={"X-API-KEY": os.environ["SERPER_API_KEY"], "content-type": "application/json"},
+            json=payload,
+            timeout=SERPER_TIMEOUT,
+        )
+        response.raise_for_status()
+        results = response.json()
+        if not results:
+            raise ValueError("Empty response from Serper API")
+        return dict(results)
+
+@st.cache_resource
+def get_search_tool():
+    # Prefer the local corpus; fall back to live web search when it hasn't been built
+    if corpus_available():
+        logging.info("Using local corpus search tool")
+        return CorpusSearchTool()
+    # Five results per source keeps the five sources' combined results a modest prompt
+    return PooledSerperDevTool(n_results=5)
+
+def create_theology_agent(llm):
+    openai_api_key = os.environ.get('OPENAI_API_KEY')
+    serper_api_key = os.environ.get('SERPER_API_KEY')
+
+    if not openai_api_key or (not serper_api_key and not corpus_available()):
+        raise ValueError("Missing API keys in environment variables.")
+
+    # No tools: the searches have already run in gather_research, so the agent
+    # composes from their results in a single pass instead of searching again
+    theology_agent = Agent(
+        llm=llm,
+        role=AGENT_ROLE,
+        goal=AGENT_GOAL,
+        backstory=agent_backstory(llm.model),
+        allow_delegation=False,
+        tools=[],
+        verbose=1,
+    )
+
+    return theology_agent
+
+# Sources searched concurrently before the answer is composed. Only the searches
+# fan out, so a question still costs one crew run and the research phase takes as
+# long as the slowest search
+RESEARCH_SOURCES = [
+    "Calvin's Institutes of the Christian Religion",
+    "Turretin's Institutes of Elenctic Theology",
+    "Bavinck's Reformed Dogmatics",
+    "Hodge's Systematic Theology",
+    "Warfield's works",
+]
+
+def search_source(user_question: str, source: str) -> str:
+    results = get_search_tool().run(search_query=f"{source} {user_question}")
+    return results if isinstance(results, str) else json.dumps(results, ensure_ascii=False)
+
+def create_theology_crew(user_question: str, research_notes, llm):
+    theology_agent = create_theology_agent(llm)
+
+    theology_task = Task(
+        description=build_task_description(user_question, research_notes),
+        expected_output=EXPECTED_OUTPUT,
+        output_file="",  # keep as empty string to avoid NoneType error
+        agent=theology_agent,
+    )
+
+    crew = Crew(
+        agents=[theology_agent],
+        tasks=[theology_task],
+        verbose=1
+    )
+
+    return crew
+
+async def gather_research(user_question: str, token_queue=None):
+    # Progress lines go to the same queue as the answer tokens, so the page shows
+    # each source finishing instead of a bare spinner during research
+    def report(text: str):
+        if token_queue is not None:
+            token_queue.put(text)
+
+    async def research(source: str):
+        try:
+            # The search tools are blocking HTTP/FAISS calls; run each on its own thread
+            notes = f"## {source}\n" + await asyncio.to_thread(search_source, user_question, source)
+        except Exception as e:
+            logging.warning(f"Search of {source} failed: {e}")
+            report(f"- ⚠️ {source}: search failed\n")
+            return None
+        report(f"- ✅ {source}\n")
+        return notes
+
+    report(f"Searching {len(RESEARCH_SOURCES)} classical sources in parallel...\n\n")
+    results = await asyncio.gather(*[research(source) for source in RESEARCH_SOURCES])
+    report("\nComposing the answer...\n\n")
+    return [notes for notes in results if notes]
+
+async def answer_question_async(user_question: str, token_queue=None):
+    research_notes = await gather_research(user_question, token_queue)
+    # A fresh LLM per answer: crewai accumulates token usage on the LLM instance,
+    # so only a per-answer instance reports this answer's tokens. It also maps the
+    # stream chunk events to exactly one token queue.
+    llm = build_llm(select_model(user_question), stream=token_queue is not None)
+    crew = create_theology_crew(user_question, research_notes, llm)
+    if token_queue is None:
+        results = await crew.kickoff_async()
+    else:
+        with stream_tokens(llm, token_queue):
+            results = await crew.kickoff_async()
+    usage = llm.get_token_usage_summary()
+    logging.info(
+        f"Answer used {usage.completion_tokens} completion tokens over "
+        f"{usage.successful_requests} LLM calls (max_tokens={MAX_TOKENS})"
+    )
+    return results
+
+def extract_answer(results) -> str:
+    if isinstance(results, CrewOutput):
+        if results.raw:
+            return results.raw
+        return results.tasks_output[-1].raw if results.tasks_output else ""
+    return str(results) if results else ""
+
+# Kept in cache_resource so the counters survive Streamlit script reruns.
+# Updated from worker threads, so always go through the helpers below.
+@st.cache_resource
+def _get_cache_stats():
+    return {"requests": 0, "exact_hits": 0, "semantic_hits": 0, "misses": 0}
+
+_cache_stats_lock = threading.Lock()
+
+def count_stat(name: str):
+    with _cache_stats_lock:
+        _get_cache_stats()[name] += 1
+
+def get_cache_stats():
+    with _cache_stats_lock:
+        return dict(_get_cache_stats())
+
+def reset_cache_stats():
+    with _cache_stats_lock:
+        _get_cache_stats().update(requests=0, exact_hits=0, semantic_hits=0, misses=0)
+
+def normalize_question(user_question: str) -> str:
+    return " ".join(user_question.lower().split())
+
+@st.cache_resource
+def get_semantic_cache():
+    # One cache per process, shared by all sessions
+    if SentenceTransformer is None:
+        return None
+    return SemanticCache(get_embedder)
+
+@st.cache_data(ttl=3600, max_entries=512, show_spinner=False)
+def _cached_answer(question_norm: str, _user_question: str, _token_queue=None, _ran=None) -> str:
+    # Keyed on the normalized question only; the crew sees the question as typed.
+    # The body only runs on an exact-cache miss, so the semantic cache is tried
+    # here, before the crew. _ran is marked so the caller can tell an exact hit
+    # from a run of the body.
+    if _ran is not None:
+        _ran["miss"] = True
+    semantic_cache = get_semantic_cache()
+    qvec = None
+    if semantic_cache is not None:
+        qvec = semantic_cache.embed(_user_question)
+        answer = semantic_cache.get(_user_question, vector=qvec)
+        if answer:
+            count_stat("semantic_hits")
+            logging.info("Theological query answered from semantic cache")
+            return answer
+    count_stat("misses")
+    results = asyncio.run(answer_question_async(_user_question, token_queue=_token_queue))
+    answer = extract_answer(results)
+    if not answer:
+        # Raising keeps st.cache_data from storing the empty answer, so a retry re-runs the crew
+        raise ValueError("Crew returned an empty answer")
+    if semantic_cache is not None:
+        semantic_cache.put(_user_question, answer, vector=qvec)
+    return answer
+
+def run_theology_search(user_question: str, token_queue=None):
+    try:
+        logging.info("Initiating theological query")
+        count_stat("requests")
+        ran = {}
+        answer = _cached_answer(normalize_question(user_question), user_question, _token_queue=token_queue, _ran=ran)
+        if not ran:
+            count_stat("exact_hits")
+        logging.info("Theological query completed")
+        return answer
+    except Exception as e:
+        logging.error(f"Error during theological search: {e}", exc_info=True)
+        return None
+
+def stream_theology_search(user_question: str):
+    """Runs the search on a worker thread and streams LLM tokens to the page until it finishes."""
+    token_queue = queue.Queue()
+    result = {}
+
+    def worker():
+        try:
+            result["answer"] = run_theology_search(user_question, token_queue)
+        finally:
+            token_queue.put(None)
+
+    # One thread per question, like the script thread Streamlit gives each session,
+    # so concurrent users never queue behind each other's crew runs
+    thread = threading.Thread(target=worker, daemon=True)
+    add_script_run_ctx(thread, get_script_run_ctx())
+    thread.start()
+
+    placeholder = st.empty()
+    with placeholder.container():
+        st.write_stream(iter(token_queue.get, None))
+    placeholder.empty()
+    thread.join()
+    return result.get("answer")
+
+def clear_caches():
+    _cached_answer.clear()
+    semantic_cache = get_semantic_cache()
+    if semantic_cache is not None:
+        semantic_cache.clear()
+    reset_cache_stats()